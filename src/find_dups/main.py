@@ -1,12 +1,13 @@
 """Find duplicates in a directory tree."""
 
 import argparse
+import sys
 from pathlib import Path
 
 from find_dups.utils import (
     fail_if_invalid,
     find_potential_duplicates,
-    format_duplicate_report,
+    iter_duplicate_report,
     normalize_extensions,
 )
 
@@ -35,7 +36,8 @@ def main() -> None:
     fail_if_invalid(directory)
 
     duplicates = find_potential_duplicates(directory, extensions)
-    print(format_duplicate_report(duplicates))
+    # Same output as print(format_duplicate_report(...)), without building it
+    sys.stdout.writelines(iter_duplicate_report(duplicates))
 
 
 if __name__ == "__main__":
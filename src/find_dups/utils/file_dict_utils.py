@@ -1,107 +1,465 @@
 """File dictionary utilities for the project."""
 
 import hashlib
-from pathlib import Path
-from typing import Any
+import io
+import mmap
+import os
+import threading
+from array import array
+from collections import defaultdict
+from collections.abc import Buffer, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Protocol, Self
 
+try:
+    import blake3
+except ImportError:  # pragma: no cover
+    blake3 = None
 
-def get_files_by_size(files: list[Path]) -> dict[int, list[Path]]:
+try:
+    import xxhash
+except ImportError:  # pragma: no cover
+    xxhash = None
+
+READ_CHUNK_SIZE = 1024 * 1024
+PEEK_SIZE = 64 * 1024
+MMAP_THRESHOLD = 8 * 1024 * 1024
+MAX_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+_thread_local = threading.local()
+
+
+@dataclass(slots=True)
+class FileIndex:
+    """Files found while walking a directory tree, stored as parallel arrays.
+
+    Files are identified by their position in the arrays, and the grouping
+    functions group these positions. Paths are only turned into Path objects
+    for the files reported as potential duplicates.
+    """
+
+    paths: list[str] = field(default_factory=list)
+    sizes: array[int] = field(default_factory=lambda: array("q"))
+    names: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        """Return the number of files in the index."""
+        return len(self.paths)
+
+    def append(self, path: str, size: int, name: str) -> None:
+        """Add a file to the index.
+
+        Args:
+            path (str): The file path.
+            size (int): The file size.
+            name (str): The file name.
+        """
+        self.paths.append(path)
+        self.sizes.append(size)
+        self.names.append(name)
+
+    def extend(self, other: Self) -> None:
+        """Add all the files of another index to this one.
+
+        Args:
+            other (FileIndex): The index whose files are added.
+        """
+        self.paths.extend(other.paths)
+        self.sizes.extend(other.sizes)
+        self.names.extend(other.names)
+
+
+def _as_dict[K, V](groups: defaultdict[K, V]) -> dict[K, V]:
+    """Turn off the default factory of a defaultdict, without copying it.
+
+    Args:
+        groups (defaultdict[K, V]): The dictionary built by a grouping function.
+
+    Returns:
+        dict[K, V]: The same dictionary, raising KeyError on missing keys.
+    """
+    groups.default_factory = None
+    return groups
+
+
+def _group_by[K, V](keys: Iterable[K], values: Iterable[V]) -> dict[K, list[V]]:
+    """Group values by their keys.
+
+    This is the loop shared by the grouping functions, so it is kept tight:
+    keys and values are parallel iterables, with no per-item function calls.
+
+    Args:
+        keys (Iterable[K]): The key of each value.
+        values (Iterable[V]): The values to group.
+
+    Returns:
+        dict[K, list[V]]: Dictionary mapping keys to lists of values.
+    """
+    groups: defaultdict[K, list[V]] = defaultdict(list)
+    for key, value in zip(keys, values, strict=True):
+        groups[key].append(value)
+    return _as_dict(groups)
+
+
+def get_files_by_size(index: FileIndex) -> dict[int, list[int]]:
     """Group files by their size.
 
     Args:
-        files (list[Path]): List of file paths.
+        index (FileIndex): The files to group.
 
     Returns:
-        dict[int, list[Path]]: Dictionary mapping file sizes to lists of file paths.
+        dict[int, list[int]]: Dictionary mapping file sizes to lists of file
+          positions in the index.
     """
-    size_dict: dict[int, list[Path]] = {}
-    for file in files:
-        size = file.stat().st_size
-        if size not in size_dict:
-            size_dict[size] = []
-        size_dict[size].append(file)
-    return size_dict
+    return _group_by(index.sizes, range(len(index)))
 
 
-def prune_non_duplicates(
-    files_dict: dict[Any, list[Path]],
-) -> dict[Any, list[Path]]:
+def prune_non_duplicates[K, V](files_dict: dict[K, list[V]]) -> dict[K, list[V]]:
     """Remove entries from the size dictionary that do not have duplicates.
 
+    The dictionary is pruned in place, to avoid copying large dictionaries.
+
     Args:
-        files_dict (dict[object, list[Path]]): Dictionary mapping some file metric
-        to lists of file paths.
+        files_dict (dict[K, list[V]]): Dictionary mapping some file metric
+        to lists of files.
+
+    Returns:
+        dict[K, list[V]]: The same dictionary, pruned to only entries that
+        have potential duplicates.
+    """
+    metrics_to_drop = [
+        metric for metric, files in files_dict.items() if len(files) <= 1
+    ]
+    for metric in metrics_to_drop:
+        del files_dict[metric]
+    return files_dict
+
+
+class _Hasher(Protocol):
+    """Interface shared by the hashers used to fingerprint file contents."""
+
+    def update(self, data: Buffer, /) -> object:
+        """Feed data to the hasher."""
+
+    def hexdigest(self) -> str:
+        """Return the digest of the data fed so far as a hex string."""
+
+
+def _new_hasher() -> _Hasher:
+    """Create a hasher to fingerprint file contents.
+
+    No cryptographic strength is needed to find duplicates, so the fastest
+    available hasher is used: BLAKE3, then xxHash, then stdlib's BLAKE2.
 
     Returns:
-        dict[object, list[Path]]: Pruned dictionary with only entries that have
-        potential duplicates.
+        _Hasher: A new hasher object.
     """
-    return {metric: files for metric, files in files_dict.items() if len(files) > 1}
+    if blake3 is not None:
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    if xxhash is not None:  # pragma: no cover
+        return xxhash.xxh3_128()
+    return hashlib.blake2b()  # pragma: no cover
+
+
+def _read_buffer(slot: int = 0) -> tuple[bytearray, memoryview]:
+    """Return a read buffer of the current thread, allocating it on first use.
+
+    Args:
+        slot (int): Index of the buffer, for callers reading several files at once.
+
+    Returns:
+        tuple[bytearray, memoryview]: The buffer and a memoryview over it.
+    """
+    try:
+        buffers = _thread_local.buffers
+    except AttributeError:
+        buffers = _thread_local.buffers = {}
+    if slot not in buffers:
+        buffer = bytearray(READ_CHUNK_SIZE)
+        buffers[slot] = (buffer, memoryview(buffer))
+    return buffers[slot]
+
+
+def _advise_sequential(fd: int) -> None:
+    """Hint the kernel that a file will be read sequentially, where supported.
+
+    On Linux this doubles the read-ahead window of the file.
+
+    Args:
+        fd (int): File descriptor of the file.
+    """
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+
+def _hash_mmap(file: str) -> str:
+    """Compute the hash of the contents of a file by memory-mapping it.
+
+    Args:
+        file (str): The file path.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    hasher = _new_hasher()
+    update_mmap = getattr(hasher, "update_mmap", None)
+    if update_mmap is not None:
+        # BLAKE3 maps the file itself, and hashes it using several threads
+        update_mmap(file)
+    else:
+        with (
+            io.FileIO(file) as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            hasher.update(mm)
+    return hasher.hexdigest()
+
+
+def _hash_one(file: str, size: int) -> str:
+    """Compute the hash of the contents of a file.
+
+    Files of at least MMAP_THRESHOLD bytes are memory-mapped, so that the
+    hasher reads the pages directly instead of copying them into a buffer.
+
+    Args:
+        file (str): The file path.
+        size (int): The size of the file.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    if size >= MMAP_THRESHOLD:
+        try:
+            return _hash_mmap(file)
+        except (OSError, ValueError):
+            # Some filesystems do not support mmap, read the file instead
+            pass
+
+    # The buffer is reused for all the files hashed by the thread to avoid
+    # per-chunk allocations. hashlib.file_digest() is not used: it runs this same
+    # loop in Python, but with a new 256 KiB buffer for every file
+    buffer, view = _read_buffer()
+    hasher = _new_hasher()
+    # FileIO is unbuffered: each readinto() is a single read() system call
+    # straight into the buffer, with no intermediate copy
+    with io.FileIO(file) as f:
+        _advise_sequential(f.fileno())
+        # Read the file in chunks to avoid memory issues with large files
+        while n := f.readinto(buffer):
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+def _fingerprint_head_tail(file: str, size: int) -> tuple[int, str]:
+    """Compute the hash of the first and last blocks of a file.
+
+    Args:
+        file (str): The file path.
+        size (int): The size of the file.
+
+    Returns:
+        tuple[int, str]: The file size and the hex digest of its first and last
+          PEEK_SIZE bytes.
+    """
+    _, view = _read_buffer()
+    hasher = _new_hasher()
+    with io.FileIO(file) as f:
+        n = f.readinto(view[:PEEK_SIZE])
+        hasher.update(view[:n])
+        f.seek(max(0, size - PEEK_SIZE))
+        n = f.readinto(view[:PEEK_SIZE])
+        hasher.update(view[:n])
+    return size, hasher.hexdigest()
+
+
+def get_files_by_head_tail(
+    index: FileIndex,
+    files_by_size_dict: dict[int, list[int]],
+) -> dict[tuple[int, str], list[int]]:
+    """Group files by their size and the hash of their first and last blocks.
+
+    This is a cheap pre-filter for the full hash: files of the same size that
+    differ at the beginning or at the end are told apart without reading them
+    completely. Files of up to 2 * PEEK_SIZE bytes are not fingerprinted, as
+    hashing them in full costs the same.
+
+    Args:
+        index (FileIndex): The files being searched.
+        files_by_size_dict (dict[int, list[int]]): Dictionary mapping file sizes
+          to lists of file positions in the index.
+
+    Returns:
+        dict[tuple[int, str], list[int]]: Dictionary mapping the file size and
+          the hash of the first and last blocks to lists of file positions.
+    """
+    head_tail_dict: dict[tuple[int, str], list[int]] = {}
+
+    files: list[int] = []
+    for size, size_files in files_by_size_dict.items():
+        if size <= 2 * PEEK_SIZE:
+            head_tail_dict[size, ""] = size_files
+            continue
+        files.extend(size_files)
+
+    paths, sizes = index.paths, index.sizes
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+        head_tail_dict.update(
+            _group_by(
+                executor.map(
+                    _fingerprint_head_tail,
+                    [paths[i] for i in files],
+                    [sizes[i] for i in files],
+                ),
+                files,
+            ),
+        )
+
+    return head_tail_dict
 
 
 def get_files_by_hash(
-    files_by_size_dict: dict[int | str, list[Path]],
-) -> dict[str, list[Path]]:
+    index: FileIndex,
+    files_by_size_dict: dict[Any, list[int]],
+) -> dict[str, list[int]]:
     """Group files by their hash value.
 
+    Files are hashed concurrently, as the hashers release the GIL while hashing.
+
+    Args:
+        index (FileIndex): The files being searched.
+        files_by_size_dict (dict[object, list[int]]): Dictionary mapping file sizes
+          (or some other file metric) to lists of file positions in the index.
+
+    Returns:
+        dict[str, list[int]]: Dictionary mapping file hashes to lists of
+          file positions in the index.
+    """
+    files = [i for size_files in files_by_size_dict.values() for i in size_files]
+
+    paths, sizes = index.paths, index.sizes
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+        return _group_by(
+            executor.map(
+                _hash_one,
+                [paths[i] for i in files],
+                [sizes[i] for i in files],
+            ),
+            files,
+        )
+
+
+def _files_equal(file_1: str, file_2: str) -> bool:
+    """Compare the contents of two files of the same size.
+
     Args:
-        files_by_size_dict (dict[int | str, list[Path]]): Dictionary mapping file sizes
-          to lists of file paths.
+        file_1 (str): The first file path.
+        file_2 (str): The second file path.
 
     Returns:
-        dict[int | str, list[Path]]: Dictionary mapping file hashes to lists of
-          file paths.
+        bool: True if both files have the same contents, False otherwise.
     """
-    hash_dict: dict[str, list[Path]] = {}
+    buffer_1, _ = _read_buffer(0)
+    buffer_2, _ = _read_buffer(1)
+    with (
+        io.FileIO(file_1) as f1,
+        io.FileIO(file_2) as f2,
+    ):
+        _advise_sequential(f1.fileno())
+        _advise_sequential(f2.fileno())
+        while n := f1.readinto(buffer_1):
+            if f2.readinto(buffer_2) != n:
+                return False
+            # Comparing bytearrays uses memcmp, memoryviews are compared per item
+            if n == READ_CHUNK_SIZE:
+                if buffer_1 != buffer_2:
+                    return False
+            elif buffer_1[:n] != buffer_2[:n]:
+                return False
+        return not f2.readinto(buffer_2)
 
-    for files in files_by_size_dict.values():
-        for file in files:
-            hasher = hashlib.md5()  # noqa: S324
-            with file.open("rb") as f:
-                # Read the file in chunks to avoid memory issues with large files
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hasher.update(chunk)
-            file_hash = hasher.hexdigest()
-            if file_hash not in hash_dict:
-                hash_dict[file_hash] = []
-            hash_dict[file_hash].append(file)
 
-    return hash_dict
+def get_identical_pairs(
+    index: FileIndex,
+    files_by_size_dict: dict[int, list[int]],
+) -> dict[str, list[int]]:
+    """Keep the pairs of files having the same contents.
 
+    Each pair is compared byte by byte, which stops at the first difference
+    and is cheaper than hashing both files.
 
-def get_files_by_name(files: list[Path]) -> dict[str, list[Path]]:
+    Args:
+        index (FileIndex): The files being searched.
+        files_by_size_dict (dict[int, list[int]]): Dictionary mapping file sizes
+          to pairs of file positions in the index.
+
+    Returns:
+        dict[str, list[int]]: Dictionary mapping file sizes (as strings) to the
+          pairs of file positions having the same contents.
+    """
+    pairs = list(files_by_size_dict.items())
+    paths = index.paths
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+        are_equal = list(
+            executor.map(
+                _files_equal,
+                [paths[files[0]] for _, files in pairs],
+                [paths[files[1]] for _, files in pairs],
+            ),
+        )
+    return {
+        str(size): files
+        for (size, files), equal in zip(pairs, are_equal, strict=True)
+        if equal
+    }
+
+
+def get_files_by_name(index: FileIndex) -> dict[str, list[int]]:
     """Group files by their name.
 
     Args:
-        files (list[Path]): List of file paths.
+        index (FileIndex): The files to group.
+
+    Returns:
+        dict[str, list[int]]: Dictionary mapping file names to lists of file
+          positions in the index.
+    """
+    return _group_by(index.names, range(len(index)))
+
+
+def _split_name(name: str) -> tuple[str, str]:
+    """Split a file name into its stem and suffix, as Path.stem and Path.suffix do.
+
+    Args:
+        name (str): The file name.
 
     Returns:
-        dict[str, list[Path]]: Dictionary mapping file names to lists of file paths.
+        tuple[str, str]: The stem and the suffix (empty if there is none).
     """
-    name_dict: dict[str, list[Path]] = {}
-    for file in files:
-        name = file.name
-        if name not in name_dict:
-            name_dict[name] = []
-        name_dict[name].append(file)
-    return name_dict
+    stem, dot, suffix = name.rpartition(".")
+    if not stem or not suffix:
+        # No dot, only a leading dot (hidden files), or a trailing dot
+        return name, ""
+    return stem, dot + suffix
 
 
-def get_files_by_stem_diff_suffix(files: list[Path]) -> dict[str, list[Path]]:
+def get_files_by_stem_diff_suffix(index: FileIndex) -> dict[str, list[int]]:
     """Group files by their stem (name without extension) having different suffixes.
 
     Args:
-        files (list[Path]): List of file paths.
+        index (FileIndex): The files to group.
 
     Returns:
-        dict[str, list[Path]]: Dictionary mapping file stems to lists of file paths.
+        dict[str, list[int]]: Dictionary mapping file stems to lists of file
+          positions in the index.
     """
-    stem_dict: dict[str, list[Path]] = {}
-    for file in files:
-        stem = file.stem
-        if stem not in stem_dict:
-            stem_dict[stem] = []
-        suffixes = {f.suffix for f in stem_dict[stem]}
-        if file.suffix not in suffixes:
-            stem_dict[stem].append(file)
-    return stem_dict
+    stem_dict: defaultdict[str, list[int]] = defaultdict(list)
+    # Suffixes already added for each stem, to check them in constant time
+    seen_suffixes: defaultdict[str, set[str]] = defaultdict(set)
+    for i, name in enumerate(index.names):
+        stem, suffix = _split_name(name)
+        suffixes = seen_suffixes[stem]
+        if suffix not in suffixes:
+            suffixes.add(suffix)
+            stem_dict[stem].append(i)
+    return _as_dict(stem_dict)
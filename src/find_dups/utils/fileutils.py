@@ -1,16 +1,27 @@
 """File utilities for the project."""
 
+import os
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from functools import partial
 from pathlib import Path
 
 from find_dups.utils.file_dict_utils import (
+    MAX_IO_WORKERS,
+    FileIndex,
     get_files_by_hash,
+    get_files_by_head_tail,
     get_files_by_name,
     get_files_by_size,
     get_files_by_stem_diff_suffix,
+    get_identical_pairs,
     prune_non_duplicates,
 )
 
+# Size buckets with exactly this many files are compared directly, not hashed
+PAIR_LEN = 2
+
 
 class DupFileReasonEnum(Enum):
     """Enum for potential duplicate file reasons."""
@@ -20,44 +31,183 @@ class DupFileReasonEnum(Enum):
     SAME_STEM_DIFF_SUFFIX = "same stem different suffix"
 
 
-def get_files(directory: Path, extensions: list[str] | None = None) -> list[Path]:
+def _has_extension(name: str, extensions: tuple[str, ...] | None) -> bool:
+    """Check whether a file name ends with one of the extensions.
+
+    A hidden file named exactly like an extension (e.g. ".txt") has no suffix,
+    so it is not considered to have that extension.
+
+    Args:
+        name (str): The file name.
+        extensions (tuple[str, ...] | None): File extensions to filter by.
+
+    Returns:
+        bool: True if no extensions are given or the name ends with one of them.
+    """
+    if extensions is None:
+        return True
+    return name.endswith(extensions) and name not in extensions
+
+
+def _scan_dir(
+    directory: str,
+    extensions: tuple[str, ...] | None,
+) -> tuple[list[str], FileIndex]:
+    """Scan a single directory, without recursing into its subdirectories.
+
+    Args:
+        directory (str): The directory to scan.
+        extensions (tuple[str, ...] | None): File extensions to filter by.
+
+    Returns:
+        tuple[list[str], FileIndex]: The subdirectories found and the files found
+          matching the extensions.
+    """
+    subdirs: list[str] = []
+    files = FileIndex()
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # DirEntry caches the file type, so no extra stat calls are made
+                # (except on filesystems not reporting it, hence the name check
+                # being done first for files)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    if not (
+                        _has_extension(entry.name, extensions)
+                        and entry.is_file(follow_symlinks=False)
+                    ):
+                        continue
+                    # The stat result is cached by DirEntry as well
+                    size = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    # Skip entries removed or made unreadable during the scan
+                    continue
+                files.append(entry.path, size, entry.name)
+    except OSError:
+        # Skip directories that cannot be read, as rglob does
+        pass
+    return subdirs, files
+
+
+def get_files(
+    directory: Path,
+    extensions: Sequence[str] | None = None,
+) -> FileIndex:
     """Retrieve files from the directory, optionally filtering by extensions.
 
+    The directory tree is walked level by level, scanning the directories of
+    each level concurrently.
+
     Args:
         directory (Path): The root directory to search.
-        extensions (list[str] | None): List of file extensions to filter by.
+        extensions (Sequence[str] | None): File extensions to filter by.
 
     Returns:
-        list[Path]: List of file paths.
+        FileIndex: The paths, sizes and names of the files found.
     """
-    return [
-        f
-        for f in directory.rglob("*")
-        if f.is_file() and (extensions is None or f.suffix in extensions)
-    ]
+    # str.endswith() only takes tuples (no-op if a tuple is given already)
+    suffixes = tuple(extensions) if extensions is not None else None
+    files = FileIndex()
+    pending = [os.fspath(directory)]
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+        while pending:
+            subdirs: list[str] = []
+            for dir_subdirs, dir_files in executor.map(
+                partial(_scan_dir, extensions=suffixes),
+                pending,
+            ):
+                subdirs.extend(dir_subdirs)
+                files.extend(dir_files)
+            pending = subdirs
+    return files
+
+
+def _to_paths(
+    index: FileIndex,
+    files_dict: dict[str, list[int]],
+) -> dict[str, list[Path]]:
+    """Replace the file positions in a dictionary by the actual file paths.
+
+    Args:
+        index (FileIndex): The files that were searched.
+        files_dict (dict[str, list[int]]): Dictionary mapping some file metric to
+          lists of file positions in the index.
+
+    Returns:
+        dict[str, list[Path]]: Dictionary mapping the same file metric to lists of
+          file paths.
+    """
+    paths = index.paths
+    return {
+        metric: [Path(paths[i]) for i in files] for metric, files in files_dict.items()
+    }
+
+
+def _find_same_contents(index: FileIndex) -> dict[str, list[int]]:
+    """Find the files having the same contents.
+
+    Files are grouped by size first, then pairs are compared directly while
+    larger groups are narrowed down by their first and last blocks and hashed.
+
+    Args:
+        index (FileIndex): The files to search.
+
+    Returns:
+        dict[str, list[int]]: Dictionary mapping file hashes (or sizes, for pairs)
+          to lists of positions in the index of files having the same contents.
+    """
+    by_size_dups_dict = prune_non_duplicates(get_files_by_size(index))
+    by_size_pairs_dict = {
+        size: size_files
+        for size, size_files in by_size_dups_dict.items()
+        if len(size_files) == PAIR_LEN
+    }
+    by_size_groups_dict = {
+        size: size_files
+        for size, size_files in by_size_dups_dict.items()
+        if len(size_files) > PAIR_LEN
+    }
+    by_head_tail_dups_dict = prune_non_duplicates(
+        get_files_by_head_tail(index, by_size_groups_dict),
+    )
+    by_hash_dups_dict = prune_non_duplicates(
+        get_files_by_hash(index, by_head_tail_dups_dict),
+    )
+    by_hash_dups_dict.update(get_identical_pairs(index, by_size_pairs_dict))
+    return by_hash_dups_dict
 
 
 def find_potential_duplicates(
     directory: Path,
-    extensions: list[str] | None = None,
+    extensions: Sequence[str] | None = None,
 ) -> dict[DupFileReasonEnum, dict[str, list[Path]]]:
     """Find potential duplicate files using different strategies.
 
+    The strategies are independent, so they run concurrently: the name based
+    ones are done while the contents of the files are being read.
+
     Args:
         directory (Path): The root directory to search.
-        extensions (list[str] | None): List of file extensions to filter by.
+        extensions (Sequence[str] | None): File extensions to filter by.
 
     Returns:
         list[list[Path]]: List of lists of file paths that are potential duplicates.
     """
-    files = get_files(directory, extensions)
-    by_size_dups_dict = prune_non_duplicates(get_files_by_size(files))
-    by_md5_dups_dict = prune_non_duplicates(get_files_by_hash(by_size_dups_dict))
-    by_name_dups_dict = prune_non_duplicates(get_files_by_name(files))
-    by_stem_dups_dict = prune_non_duplicates(get_files_by_stem_diff_suffix(files))
+    index = get_files(directory, extensions)
+    with ThreadPoolExecutor(max_workers=len(DupFileReasonEnum)) as executor:
+        by_hash_future = executor.submit(_find_same_contents, index)
+        by_name_future = executor.submit(get_files_by_name, index)
+        by_stem_future = executor.submit(get_files_by_stem_diff_suffix, index)
+
+        by_hash_dups_dict = by_hash_future.result()
+        by_name_dups_dict = prune_non_duplicates(by_name_future.result())
+        by_stem_dups_dict = prune_non_duplicates(by_stem_future.result())
 
     return {
-        DupFileReasonEnum.SAME_SIZE_AND_HASH: by_md5_dups_dict,
-        DupFileReasonEnum.SAME_NAME: by_name_dups_dict,
-        DupFileReasonEnum.SAME_STEM_DIFF_SUFFIX: by_stem_dups_dict,
+        DupFileReasonEnum.SAME_SIZE_AND_HASH: _to_paths(index, by_hash_dups_dict),
+        DupFileReasonEnum.SAME_NAME: _to_paths(index, by_name_dups_dict),
+        DupFileReasonEnum.SAME_STEM_DIFF_SUFFIX: _to_paths(index, by_stem_dups_dict),
     }
@@ -1,10 +1,45 @@
 """Report utilities for the project."""
 
+import os
+from collections.abc import Iterator
 from pathlib import Path
 
 from find_dups.utils.fileutils import DupFileReasonEnum
 
 
+def iter_duplicate_report(
+    duplicates: dict[DupFileReasonEnum, dict[str, list[Path]]],
+) -> Iterator[str]:
+    """Generate a report of potential duplicate files, segment by segment.
+
+    This lets large reports be written out without building them in memory.
+    Joined, the segments are the report followed by a newline.
+
+    Args:
+        duplicates (dict[DupFileReasonEnum, list[list[Path]]]): Dictionary mapping
+          duplicate reasons to lists of file paths.
+
+    Yields:
+        str: The next segment of the report.
+    """
+    fspath = os.fspath
+    for reason, files_dict in duplicates.items():
+        yield "Reason: "
+        yield reason.value
+        yield "\n"
+        if not files_dict:
+            yield "    No potential duplicates found.\n"
+            yield "\n"
+            continue
+        for files in files_dict.values():
+            for file in files:
+                yield "    - "
+                yield fspath(file)
+                yield "\n"
+            yield "\n"  # Add an empty line between groups of duplicates
+        yield "\n"  # Add an empty line between reasons
+
+
 def format_duplicate_report(
     duplicates: dict[DupFileReasonEnum, dict[str, list[Path]]],
 ) -> str:
@@ -17,14 +52,7 @@ def format_duplicate_report(
     Returns:
         str: Formatted report string.
     """
-    report_lines = []
-    for reason, files_dict in duplicates.items():
-        report_lines.append(f"Reason: {reason.value}")
-        if not files_dict:
-            report_lines.append("    No potential duplicates found.\n")
-            continue
-        for _, files in files_dict.items():  # noqa: PERF102
-            report_lines.extend([f"    - {file}" for file in files])
-            report_lines.append("")  # Add an empty line between groups of duplicates
-        report_lines.append("")  # Add an empty line between reasons
-    return "\n".join(report_lines)
+    segments = list(iter_duplicate_report(duplicates))
+    if segments:
+        segments.pop()  # The report does not end with a newline
+    return "".join(segments)
@@ -4,16 +4,18 @@ import sys
 from pathlib import Path
 
 
-def normalize_extensions(extensions: list[str]) -> list[str]:
+def normalize_extensions(extensions: list[str]) -> tuple[str, ...]:
     """Normalize file extensions to ensure they start with a dot.
 
+    A tuple is returned so that it can be passed to str.endswith() as is.
+
     Args:
         extensions (list[str]): List of file extensions.
 
     Returns:
-        list[str]: Normalized list of file extensions.
+        tuple[str, ...]: Normalized tuple of file extensions.
     """
-    return [ext if ext.startswith(".") else f".{ext}" for ext in extensions]
+    return tuple(ext if ext.startswith(".") else f".{ext}" for ext in extensions)
 
 
 def fail_if_invalid(directory: Path) -> None:
@@ -1,5 +1,8 @@
 """Unit tests for utils (testing only the public interface)."""
 
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 import pytest
@@ -9,6 +12,7 @@ from find_dups.utils import (
     fail_if_invalid,
     find_potential_duplicates,
     format_duplicate_report,
+    iter_duplicate_report,
     normalize_extensions,
 )
 
@@ -18,14 +22,14 @@ from find_dups.utils import (
 def test_normalize_extensions() -> None:
     """Test the normalize_extensions function."""
     input_extensions = ["txt", ".jpg", "png", ".md"]
-    expected_output = [".txt", ".jpg", ".png", ".md"]
+    expected_output = (".txt", ".jpg", ".png", ".md")
     assert normalize_extensions(input_extensions) == expected_output
 
 
 def test_normalize_extensions_empty() -> None:
     """Test normalize_extensions with an empty list."""
     input_extensions = []
-    expected_output = []
+    expected_output = ()
     assert normalize_extensions(input_extensions) == expected_output
 
 
@@ -152,6 +156,112 @@ def test_potential_duplicates_with_extensions(tmp_path: Path) -> None:
     }
 
 
+def test_potential_duplicates_stem_repeated_suffix(tmp_path: Path) -> None:
+    """Test that same stem duplicates only keep the first file of each suffix."""
+    (tmp_path / "subdir").mkdir()
+    (tmp_path / "report.txt").write_text("Text content.")
+    (tmp_path / "subdir" / "report.txt").write_text("Other text content.")
+    (tmp_path / "subdir" / "report.log").write_text("Log content.")
+
+    duplicates = find_potential_duplicates(tmp_path)
+
+    stem_dups = duplicates[DupFileReasonEnum.SAME_STEM_DIFF_SUFFIX]
+    assert len(stem_dups) == 1
+    assert set(stem_dups.popitem()[1]) == {
+        tmp_path / "report.txt",
+        tmp_path / "subdir" / "report.log",
+    }
+
+
+def test_potential_duplicates_stem_without_suffix(tmp_path: Path) -> None:
+    """Test same stem duplicates for files without suffix and hidden files."""
+    (tmp_path / "README").write_text("Readme.")
+    (tmp_path / "README.md").write_text("Markdown readme.")
+    (tmp_path / ".bashrc").write_text("Shell config.")
+    (tmp_path / ".bashrc.bak").write_text("Shell config backup.")
+    (tmp_path / "archive.tar.gz").write_text("Archive.")
+
+    duplicates = find_potential_duplicates(tmp_path)
+
+    stem_dups = duplicates[DupFileReasonEnum.SAME_STEM_DIFF_SUFFIX]
+    assert {stem: set(files) for stem, files in stem_dups.items()} == {
+        "README": {tmp_path / "README", tmp_path / "README.md"},
+        ".bashrc": {tmp_path / ".bashrc", tmp_path / ".bashrc.bak"},
+    }
+
+
+def test_potential_duplicates_with_extensions_dir_names(tmp_path: Path) -> None:
+    """Test that directories matching the extensions are walked, not reported."""
+    (tmp_path / "photos.jpg").mkdir()
+    (tmp_path / "photos.jpg" / "photo1.jpg").write_text("Content A")
+    (tmp_path / "photo2.jpg").write_text("Content A")
+    (tmp_path / "photos.txt").write_text("Content B")
+
+    duplicates = find_potential_duplicates(tmp_path, extensions=(".jpg",))
+
+    size_hash_dups = duplicates[DupFileReasonEnum.SAME_SIZE_AND_HASH]
+    assert len(size_hash_dups) == 1
+    assert set(size_hash_dups.popitem()[1]) == {
+        tmp_path / "photos.jpg" / "photo1.jpg",
+        tmp_path / "photo2.jpg",
+    }
+    assert duplicates[DupFileReasonEnum.SAME_STEM_DIFF_SUFFIX] == {}
+
+
+def test_potential_duplicates_with_extensions_hidden_file(tmp_path: Path) -> None:
+    """Test that a hidden file named like an extension does not match it."""
+    (tmp_path / "file1.txt").write_text("Content A")
+    (tmp_path / ".txt").write_text("Content A")
+
+    duplicates = find_potential_duplicates(tmp_path, extensions=(".txt",))
+
+    assert duplicates[DupFileReasonEnum.SAME_SIZE_AND_HASH] == {}
+
+
+def test_potential_duplicates_vanished_file(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a file that cannot be stat'ed does not hide its siblings."""
+    (tmp_path / "file1.txt").write_text("Content A")
+    (tmp_path / "file2.txt").write_text("Content A")
+    (tmp_path / "vanished.txt").write_text("Content A")
+    (tmp_path / "subdir").mkdir()
+    (tmp_path / "subdir" / "file3.txt").write_text("Content A")
+
+    class VanishedEntry:
+        def __init__(self, entry: os.DirEntry[str]) -> None:
+            self._entry = entry
+
+        def __getattr__(self, name: str) -> object:
+            return getattr(self._entry, name)
+
+        def stat(self, **_kwargs: bool) -> os.stat_result:
+            raise FileNotFoundError(self._entry.path)
+
+    scandir = os.scandir
+
+    @contextmanager
+    def scandir_with_vanished_file(path: str) -> Iterator[Iterator[object]]:
+        with scandir(path) as entries:
+            yield (
+                VanishedEntry(entry) if entry.name == "vanished.txt" else entry
+                for entry in entries
+            )
+
+    monkeypatch.setattr(os, "scandir", scandir_with_vanished_file)
+
+    duplicates = find_potential_duplicates(tmp_path)
+
+    size_hash_dups = duplicates[DupFileReasonEnum.SAME_SIZE_AND_HASH]
+    assert len(size_hash_dups) == 1
+    assert set(size_hash_dups.popitem()[1]) == {
+        tmp_path / "file1.txt",
+        tmp_path / "file2.txt",
+        tmp_path / "subdir" / "file3.txt",
+    }
+
+
 def test_potential_duplicates_hand_crafted(tmp_path: Path) -> None:
     """Test find_potential_duplicates with a hand-crafted scenario."""
     # Create directory structure with duplicates of different types
@@ -274,6 +384,71 @@ def test_potential_duplicates_hand_crafted(tmp_path: Path) -> None:
     }
 
 
+def test_potential_duplicates_large_files(tmp_path: Path) -> None:
+    """Test find_potential_duplicates with files spanning several read chunks."""
+    content = bytes(range(256)) * 6 * 1024  # 1.5 MiB
+    (tmp_path / "big_1.bin").write_bytes(content)
+    (tmp_path / "big_2.bin").write_bytes(content)
+    # Same size, but differs only after the first chunk
+    (tmp_path / "big_3.bin").write_bytes(content[:-1] + b"\x00")
+    # Same size, same first and last blocks, but differs in the middle
+    middle = len(content) // 2
+    (tmp_path / "big_4.bin").write_bytes(
+        content[:middle] + b"\xff" + content[middle + 1 :],
+    )
+    # Same size, but differs in the first block
+    (tmp_path / "big_5.bin").write_bytes(b"\xff" + content[1:])
+
+    duplicates = find_potential_duplicates(tmp_path)
+
+    size_hash_dups = duplicates[DupFileReasonEnum.SAME_SIZE_AND_HASH]
+    assert len(size_hash_dups) == 1
+    assert set(size_hash_dups.popitem()[1]) == {
+        tmp_path / "big_1.bin",
+        tmp_path / "big_2.bin",
+    }
+
+
+def test_potential_duplicates_large_pairs(tmp_path: Path) -> None:
+    """Test find_potential_duplicates with pairs of files of the same size."""
+    content = bytes(range(256)) * 6 * 1024  # 1.5 MiB
+    (tmp_path / "pair_1a.bin").write_bytes(content)
+    (tmp_path / "pair_1b.bin").write_bytes(content)
+    # Same size, but differs only after the first chunk
+    (tmp_path / "pair_2a.bin").write_bytes(content + b"\x00")
+    (tmp_path / "pair_2b.bin").write_bytes(content + b"\xff")
+
+    duplicates = find_potential_duplicates(tmp_path)
+
+    size_hash_dups = duplicates[DupFileReasonEnum.SAME_SIZE_AND_HASH]
+    assert len(size_hash_dups) == 1
+    assert set(size_hash_dups.popitem()[1]) == {
+        tmp_path / "pair_1a.bin",
+        tmp_path / "pair_1b.bin",
+    }
+
+
+def test_potential_duplicates_memory_mapped_files(tmp_path: Path) -> None:
+    """Test find_potential_duplicates with files large enough to be mmap'ed."""
+    content = bytes(range(256)) * 36 * 1024  # 9 MiB
+    (tmp_path / "huge_1.bin").write_bytes(content)
+    (tmp_path / "huge_2.bin").write_bytes(content)
+    # Same size, same first and last blocks, but differs in the middle
+    middle = len(content) // 2
+    (tmp_path / "huge_3.bin").write_bytes(
+        content[:middle] + b"\xff" + content[middle + 1 :],
+    )
+
+    duplicates = find_potential_duplicates(tmp_path)
+
+    size_hash_dups = duplicates[DupFileReasonEnum.SAME_SIZE_AND_HASH]
+    assert len(size_hash_dups) == 1
+    assert set(size_hash_dups.popitem()[1]) == {
+        tmp_path / "huge_1.bin",
+        tmp_path / "huge_2.bin",
+    }
+
+
 def test_format_duplicate_report_empty() -> None:
     """Test format_duplicate_report with no duplicates."""
     duplicates: dict[DupFileReasonEnum, dict[str, list[Path]]] = {
@@ -339,3 +514,19 @@ def test_format_duplicate_report_with_duplicates() -> None:
     ]
 
     assert report == "\n".join(expected_lines)
+
+
+def test_iter_duplicate_report() -> None:
+    """Test that iter_duplicate_report streams the formatted report."""
+    duplicates: dict[DupFileReasonEnum, dict[str, list[Path]]] = {
+        DupFileReasonEnum.SAME_SIZE_AND_HASH: {
+            "duplicate_group_1": [
+                Path("dup1.txt"),
+                Path("dup2.txt"),
+            ],
+        },
+        DupFileReasonEnum.SAME_NAME: {},
+        DupFileReasonEnum.SAME_STEM_DIFF_SUFFIX: {},
+    }
+    report = "".join(iter_duplicate_report(duplicates))
+    assert report == format_duplicate_report(duplicates) + "\n"